@@ -1,17 +1,74 @@
+import functools
+import gzip
+import json
 import os
+import re
 import time
-import json
+import multiprocessing
+import queue
 import sys
+import threading
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# orjson 是選配的加速器，沒裝就退回內建 json
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+# OpenMP/MKL 執行緒數要在載入 faster_whisper (CTranslate2) 前設定才保證生效
+os.environ.setdefault("OMP_NUM_THREADS", str(os.cpu_count() or 1))
+os.environ.setdefault("MKL_NUM_THREADS", str(os.cpu_count() or 1))
+
 from faster_whisper import WhisperModel
-from typing import Optional
+from faster_whisper.audio import decode_audio
+
+# BatchedInferencePipeline 是 faster-whisper >= 1.0 才有的批次推論管線
+try:
+    from faster_whisper import BatchedInferencePipeline
+    _HAS_BATCHED = True
+except ImportError:
+    _HAS_BATCHED = False
+from typing import List, Optional, Tuple, Union
 from tqdm import tqdm
 from opencc import OpenCC
 
+# 高頻「簡體專用」字抽樣 (繁體文本不會出現這些字形)
+# Whisper 對台灣節目常直接輸出繁體；整份文字都沒命中就可以跳過 OpenCC
+_SIMPLIFIED_RE = re.compile(
+    "[们这来对时会学国说为样发电话车东书见觉让认识语读写听请谁谢边过进远运动点热"
+    "万两严丽乐习乡亏亚产亲亿众优传伤伦体侠侣侦侧侨俩俭债倾偿儿党兰关兴养兽内冈"
+    "军农冲决况冻净凤凯刘则刚创删劳势华协单卖卫厂厅历压县双变号叹吗听员团园围图"
+    "圆圣场坏块坚坛垫墙声壳处备复头夹夺奋妇妈娇孙宁宝实审宪宫寻导寿将尔尘层岁岗"
+    "岛币师帐带帮干广庆库应庙废开异张弯弹强归当录彻忆怀怜总恋恶恼悬惊惨惯愤愿戏"
+    "战扑执扩扫扬扰抚护报担拟拣拥拦拨择挂挣挤挥损换据掷摄摆摇摊敌断旧时旷显晓晕"
+    "暂术机杀杂权条杨构标栏树样桥检横欢欧歼残气汉沟没泪泽洁浅测济浏浓涛润渐湾满"
+    "滚滨灭灯灵灾点炼烦烧热爱爷牵犹独猎献环现琼电画畅疗疯监盖盘确种积称笔筛简类"
+    "粮紧纠红约级纪纯纲纳纵纷纸纽线练组细织终绍经结绕绘给络绝统继绩维绳网绿缓编"
+    "缘缠缩缴罚罗罢职联肾肿胀脏脑脚脸膑舰艰节芦苏药虑虽蚀蚁补表见观规视览觉誉计"
+    "订认讨让训议讯记讲许论讽设访证评识诉词译试诗话询该详语误说请诸读课谈谊谋谓"
+    "谜谢贝贞负贡财责败货质贩贪购贫贯贴贵费贺资赏赐赔赖赚赛赵赶趋踪车轨轩转轮软"
+    "轻载较辅辆辈辉辞辩边达迁过迈运这进违连迟适选逊递逻遗邓邮邻释针钓钟钢钱铁铺"
+    "销锁锅错锦键镇长门闪闭问闯闲间闷闹闻阅队阳阴阵阶际陆陈险随隐难雾韦页顶项顺"
+    "须顾顿预领频题颜额风飘飞饭饮饰饱饿馆马驱驶驻驾验骑骗骨鱼鲁鸟鸡鸣鸭鸿麦黄龄]"
+)
+
+@functools.lru_cache(maxsize=1)
+def _get_cc():
+    """OpenCC 轉換器 (整個行程共用一份，建構時要解析 400KB+ 的字典檔)"""
+    # s2twp 代表：Simplified to Traditional (Taiwan) with Phrases (包含台灣慣用語轉換)
+    return OpenCC('s2twp')
+
 # --- 環境與路徑輔助函式 ---
+# 兩個函式都是冪等的，memoize 之後整個行程只偵測/檢查一次
+@functools.lru_cache(maxsize=1)
 def detect_environment():
     """偵測是否在 Colab 環境"""
     return "COLAB_RELEASE_TAG" in os.environ or 'google.colab' in sys.modules
 
+@functools.lru_cache(maxsize=1)
 def get_project_root():
     """回傳專案根目錄"""
     if detect_environment():
@@ -24,47 +81,160 @@ def get_project_root():
     else:
         return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+def _mmss(sec: float) -> str:
+    """秒數 -> MM:SS (整數運算，一個 segment 只做一次轉型)"""
+    s = int(sec)
+    return f"{s // 60:02d}:{s % 60:02d}"
+
+def _load_audio(path: str) -> np.ndarray:
+    """
+    把音檔解碼成 16 kHz 單聲道 float32 numpy 陣列
+    (faster-whisper 內建的 PyAV 解碼，行程內完成，不用每次轉錄都重讀磁碟)
+    """
+    return decode_audio(path, sampling_rate=16000)
+
+# 量化精度備援順序：硬體不支援指定精度時，依序退回下一個能跑的
+# (例如老 GPU 沒有 FP16 Tensor Core 時 int8_float16 -> int8)
+_COMPUTE_FALLBACKS = {
+    "int8_float16": ["int8", "float32"],
+    "float16": ["int8_float16", "int8", "float32"],
+    "int8": ["int8_float32", "float32"],
+}
+
+@functools.lru_cache(maxsize=4)
+def _load_model(model_size: str, device: str, compute_type: str, download_root: str,
+                cpu_threads: int, num_workers: int):
+    """
+    載入 WhisperModel，含量化精度備援；lru_cache 讓同一組設定在行程內只載一次
+    (notebook 重跑 cell 再建 PodcastTranscriber 時，large-v3 的數 GB 載入直接省掉)
+    :return: (model, 實際使用的 compute_type)
+    """
+    last_error = None
+    for ct in [compute_type] + _COMPUTE_FALLBACKS.get(compute_type, []):
+        try:
+            model = WhisperModel(
+                model_size,
+                device=device,
+                compute_type=ct,
+                download_root=download_root,
+                cpu_threads=cpu_threads,
+                num_workers=num_workers
+            )
+            if ct != compute_type:
+                print(f"⚠️ 精度 {compute_type} 不支援，改用 {ct}")
+            return model, ct
+        except ValueError as e:
+            # CTranslate2 對不支援的 compute_type 丟 ValueError，換下一個精度再試
+            last_error = e
+    raise last_error
+
+# --- 多行程 worker (CPU 平行轉錄用) ---
+# CTranslate2 模型不能跨 fork 共用，每個 worker 行程各自建一份 transcriber
+_WORKER_TRANSCRIBER = None
+
+def _init_worker(model_size: str, device: str, compute_type: str, cpu_threads: int):
+    global _WORKER_TRANSCRIBER
+    # 每個 worker 只分到 1/K 的核心，避免 K 份 OpenMP 執行緒互相踩踏
+    os.environ["OMP_NUM_THREADS"] = str(cpu_threads)
+    _WORKER_TRANSCRIBER = PodcastTranscriber(model_size, device, compute_type,
+                                             cpu_threads=cpu_threads)
+
+def _transcribe_one(task):
+    audio_path, output_dir, language, prompt, beam_size = task
+    return _WORKER_TRANSCRIBER.transcribe_file(
+        audio_path=audio_path,
+        output_dir=output_dir,
+        language=language,
+        initial_prompt=prompt,
+        beam_size=beam_size
+    )
+
 # --- 核心轉錄類別 ---
 class PodcastTranscriber:
-    def __init__(self, model_size: str, device: str, compute_type: str):
-        project_root = get_project_root()
+    def __init__(self, model_size: str, device: str, compute_type: str,
+                 project_root: Optional[str] = None,
+                 cpu_threads: Optional[int] = None, num_workers: int = 1,
+                 warmup: bool = True):
+        self.model_size = model_size
+        self.device = device
+
+        # CPU 的 int8 GEMM 是 compute-bound，執行緒數沒開滿等於白白少掉好幾倍吞吐
+        if cpu_threads is None:
+            cpu_threads = (os.cpu_count() or 1) if device != "cuda" else 0
+        self.cpu_threads = cpu_threads
+        # 呼叫端已經有根目錄的話直接傳進來，省掉環境偵測
+        if project_root is None:
+            project_root = get_project_root()
         model_root = os.path.join(project_root, "models")
         
-        # s2twp 代表：Simplified to Traditional (Taiwan) with Phrases (包含台灣慣用語轉換)
-        self.cc = OpenCC('s2twp')
+        self.cc = _get_cc()
 
         if not os.path.exists(model_root):
             os.makedirs(model_root)
 
         print(f"🚀 正在載入 Whisper 模型: {model_size} ({device}) | 精度: {compute_type}...")
-        
+
         try:
-            self.model = WhisperModel(
-                model_size, 
-                device=device, 
-                compute_type=compute_type,
-                download_root=model_root
+            self.model, self.compute_type = _load_model(
+                model_size, device, compute_type, model_root, cpu_threads, num_workers
             )
             print("✅ 模型載入完成！")
         except Exception as e:
             print(f"❌ 模型載入失敗: {e}")
             raise
 
-    def transcribe_file(self, audio_path: str, output_dir: str, language: str, initial_prompt: str) -> Optional[str]:
+        # GPU 上用批次推論：VAD 切出的多個片段合成一個 batch 一起過 encoder/decoder，
+        # 單檔逐片段推論填不滿 GPU，批次化通常快 4 倍以上
+        self.batched = None
+        if device == "cuda" and _HAS_BATCHED:
+            self.batched = BatchedInferencePipeline(model=self.model)
+            print("⚡ 已啟用批次推論管線 (batch_size=16)")
+
+        # 暖機：拿 1 秒靜音跑一次，把 CUDA kernel 編譯/工作區配置的首次成本
+        # 移到這裡付，之後每個檔案的第一個 segment 就不會特別慢
+        # (不需要的場合，例如單元測試或只想載模型，可以用 warmup=False 關掉)
+        if warmup:
+            try:
+                warm_segments, _ = self.model.transcribe(
+                    np.zeros(16000, dtype=np.float32), beam_size=1, language='zh', vad_filter=False
+                )
+                list(warm_segments) # 產生器要抽乾才會真的執行
+            except Exception as e:
+                print(f"⚠️ 模型暖機失敗 (不影響後續轉錄): {e}")
+
+    def transcribe_file(self, audio_path: str, output_dir: str, language: str, initial_prompt: str,
+                        beam_size: int = 1, best_of: int = 1,
+                        temperature: Union[float, Tuple[float, ...]] = (0.0, 0.2, 0.4),
+                        done: Optional[set] = None,
+                        audio: Optional[np.ndarray] = None) -> Optional[str]:
         if not os.path.exists(audio_path):
             print(f"❌ 錯誤：找不到檔案 {audio_path}")
             return None
 
         file_name = os.path.basename(audio_path)
-        
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
+
+        # transcribe_folder (會傳 done 進來) 已經建好輸出目錄，
+        # 單獨呼叫時才需要在這裡確保目錄存在
+        if done is None:
+            os.makedirs(output_dir, exist_ok=True)
 
         base_name = os.path.splitext(file_name)[0]
         txt_path = os.path.join(output_dir, f"{base_name}.txt")
-        json_path = os.path.join(output_dir, f"{base_name}.json")
+        # .txt 給人讀所以不壓；.json.gz 給程式讀，gzip 後通常只剩 ~15% 大小，
+        # Drive 同步/儲存都省 (下游用 gzip.open 讀)
+        json_path = os.path.join(output_dir, f"{base_name}.json.gz")
+
+        # done 是 transcribe_folder 預先掃好的已完成清單 (set 查詢取代逐檔 stat)
+        if done is not None:
+            already_done = base_name in done
+        else:
+            # 音檔比轉錄新 (同名重新上傳過) 就視為未完成，重新轉錄
+            already_done = (
+                os.path.exists(txt_path) and os.path.exists(json_path)
+                and os.path.getmtime(json_path) >= os.path.getmtime(audio_path)
+            )
 
-        if os.path.exists(txt_path) and os.path.exists(json_path):
+        if already_done:
             print(f"⏭️  跳過已轉錄檔案: {file_name}")
             return txt_path
 
@@ -72,75 +242,133 @@ class PodcastTranscriber:
         start_time = time.time()
 
         try:
+            # 先一次解碼成 numpy (呼叫端也可以傳預先解好的 audio 進來)，
+            # 轉錄時就不用再開解碼器重讀一次磁碟
+            if audio is None:
+                audio = _load_audio(audio_path)
+
             # 這裡把 condition_on_previous_text 設為 False，能大幅減少「幻覺迴圈」
-            segments, info = self.model.transcribe(
-                audio_path, 
-                beam_size=5, 
-                language=language, 
+            # beam_size 預設 1 (greedy)：解碼量是 beam=5 的 1/5，
+            # 乾淨的對話音檔品質幾乎沒差；難的音檔可以自行調回 5
+            # temperature 梯度只到 0.4：卡住時升溫重解碼脫困，但不會像預設一路升到 1.0
+            # 下面三個門檻會快速剪掉靜音/重複內容的病態長 segment，消除檔案中段的「卡住」
+            transcribe_kwargs = dict(
+                beam_size=beam_size,
+                best_of=best_of,
+                temperature=temperature,
+                no_speech_threshold=0.6,
+                compression_ratio_threshold=2.4,
+                log_prob_threshold=-1.0,
+                language=language,
                 vad_filter=True,
+                # 比預設更積極地切掉長靜音：podcast 的沉默/音樂橋段不用進 decoder
+                vad_parameters={"min_silence_duration_ms": 500, "speech_pad_ms": 200, "threshold": 0.5},
                 initial_prompt=initial_prompt,
-                condition_on_previous_text=False 
+                condition_on_previous_text=False
             )
 
+            if self.batched is not None:
+                segments, info = self.batched.transcribe(audio, batch_size=16, **transcribe_kwargs)
+            else:
+                segments, info = self.model.transcribe(audio, **transcribe_kwargs)
+
             print(f"   ℹ️  語言: {info.language} | 總長度: {info.duration:.2f} 秒")
-            
-            transcript_data = []
-            full_text_lines = []
-            
-            full_text_lines.append(f"來源: {file_name}")
-            full_text_lines.append(f"模型: large-v3 | 時間: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-            full_text_lines.append("-" * 50 + "\n")
-
-            # --- 變數初始化：去重邏輯 ---
-            last_text = "" 
-            repeat_count = 0
-            MAX_REPEATS = 1  # 允許重複幾次？ 1 代表允許出現兩次 (原句 + 1次重複)
-
-            # 設定進度條
-            with tqdm(total=round(info.duration, 2), unit='s', desc="Processing", leave=True, ascii=True, ncols=100) as pbar:
-                for i, segment in enumerate(segments, 1):
-                    raw_text = segment.text.strip()
-                    
-                    # --- 新增：強制轉繁體 ---
-                    text = self.cc.convert(raw_text)
-                    
-                    # --- 改良版去重邏輯 ---
-                    if text == last_text:
-                        repeat_count += 1
-                    else:
-                        repeat_count = 0  # 內容不同，重置計數器
-                    
-                    last_text = text # 更新上一句記錄
-
-                    # 如果重複次數超過閾值，則跳過 (視為幻覺)
-                    if repeat_count > MAX_REPEATS:
-                        continue
+
+            # 留下來的 segment 先存輕量 tuple，最後序列化時才展開成 dict
+            kept_segments = [] # (id, start, end, text)
+
+            # --- 生產者/消費者管線 ---
+            # 主執行緒專心把 segments 產生器抽乾 (驅動 Whisper 的 C++ 解碼)，
+            # 收集與進度條交給背景執行緒，兩邊工作重疊進行
+            seg_queue = queue.Queue(maxsize=64)
+            raw_segments = [] # (start, end, 原始文字)
+
+            def _consume():
+                # 非 TTY 環境 (Colab/重導向) 的 tqdm 重繪特別貴，改成每 60 秒音訊印一行
+                is_tty = sys.stdout.isatty()
+                next_report = 60
+
+                # mininterval=1.0: 每秒最多重繪一次，長檔幾百個 segment 不會狂刷終端機
+                with tqdm(total=round(info.duration, 2), unit='s', desc="Processing", leave=True,
+                          ascii=True, ncols=100, mininterval=1.0, disable=not is_tty) as pbar:
+                    while True:
+                        segment = seg_queue.get()
+                        if segment is None:
+                            break
+
+                        raw_segments.append((segment.start, segment.end, segment.text.strip()))
+
+                        # 更新進度條 (segment.end 是這句話結束的時間點)
+                        pbar.update(segment.end - pbar.n)
+
+                        if not is_tty and segment.end >= next_report:
+                            print(f"   ⏳ 已處理 {int(segment.end)} / {int(info.duration)} 秒")
+                            next_report += 60
+
+            consumer = threading.Thread(target=_consume, daemon=True)
+            consumer.start()
+
+            try:
+                for segment in segments:
+                    seg_queue.put(segment)
+            finally:
+                seg_queue.put(None) # 收工訊號
+                consumer.join()
+
+            # --- 整檔一次轉繁體 ---
+            # 逐句呼叫 OpenCC 每句都要付一次 Python<->C++ 邊界成本，
+            # 整檔合併成一次呼叫快上數十倍；用罕見的控制字元當分隔符避免撞字
+            _SEP = "\x01"
+            if raw_segments:
+                joined = _SEP.join(raw for _, _, raw in raw_segments)
+                # 已經是繁體的文本 (整份掃不到簡體字) 直接跳過 OpenCC
+                if _SIMPLIFIED_RE.search(joined):
+                    converted_texts = self.cc.convert(joined).split(_SEP)
+                else:
+                    converted_texts = [raw for _, _, raw in raw_segments]
+            else:
+                converted_texts = []
+
+            # --- 滑動視窗去重邏輯 (在轉換後的文字上進行) ---
+            # 只看「上一句」抓不到 Whisper 常見的 A B A B A B 交錯幻覺，
+            # 改成記最近 6 句：同一句在視窗內出現第 3 次起視為幻覺丟棄
+            recent = deque(maxlen=6)
+
+            # 逐行寫進帶緩衝的檔案，不用先在記憶體堆一份完整逐字稿再 join
+            # 先寫 .part，全部成功才 os.replace 成正式檔名，中途掛掉不會留半成品
+            with open(txt_path + ".part", "w", encoding="utf-8", buffering=1 << 16) as txt_f:
+                txt_f.write(f"來源: {file_name}\n")
+                txt_f.write(f"模型: large-v3 | 時間: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+                txt_f.write("-" * 50 + "\n\n")
+
+                for seg_id, ((seg_start, seg_end, _), text) in enumerate(zip(raw_segments, converted_texts), 1):
+                    recent.append(text)
+                    if recent.count(text) >= 3:
+                        continue # 視為幻覺，跳過
                     # -----------------------
 
-                    start_m, start_s = divmod(int(segment.start), 60)
-                    end_m, end_s = divmod(int(segment.end), 60)
-                    time_str = f"[{start_m:02d}:{start_s:02d} -> {end_m:02d}:{end_s:02d}]"
-                    
-                    line = f"{time_str} {text}"
-                    full_text_lines.append(line)
-                    
-                    transcript_data.append({
-                        "id": i,
-                        "start": segment.start,
-                        "end": segment.end,
-                        "text": text
-                    })
-
-                    # 更新進度條
-                    # segment.end 是目前這句話結束的時間點
-                    # 我們將進度條更新到這個時間點
-                    pbar.update(segment.end - pbar.n)
-
-            with open(txt_path, "w", encoding="utf-8") as f:
-                f.write("\n".join(full_text_lines))
-
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(transcript_data, f, ensure_ascii=False, indent=2)
+                    txt_f.write(f"[{_mmss(seg_start)} -> {_mmss(seg_end)}] {text}\n")
+
+                    kept_segments.append((seg_id, seg_start, seg_end, text))
+
+            # 展開成 dict 延後到這裡一次做完，主迴圈不用逐段配置 dict
+            transcript_data = [
+                {"id": i, "start": s, "end": e, "text": t}
+                for i, s, e, t in kept_segments
+            ]
+
+            # orjson 是 C 擴充，輸出 UTF-8 bytes，中文文本序列化比內建 json 快好幾倍
+            # 機器讀的檔案不用縮排，compresslevel=3 在壓縮率與速度間取平衡
+            if _HAS_ORJSON:
+                with gzip.open(json_path + ".part", "wb", compresslevel=3) as f:
+                    f.write(orjson.dumps(transcript_data))
+            else:
+                with gzip.open(json_path + ".part", "wt", encoding="utf-8", compresslevel=3) as f:
+                    json.dump(transcript_data, f, ensure_ascii=False, separators=(",", ":"))
+
+            # txt 先就位、json 最後，這樣「.json.gz 存在」才足以代表整份轉錄完成
+            os.replace(txt_path + ".part", txt_path)
+            os.replace(json_path + ".part", json_path)
 
             duration = time.time() - start_time
             print(f"✅ 完成！耗時: {duration:.2f}s")
@@ -150,26 +378,120 @@ class PodcastTranscriber:
             print(f"❌ 失敗: {file_name} - {e}")
             return None
 
-    def transcribe_folder(self, folder_path: str, output_path: str, language: str, prompt: str):
+    def transcribe_folder(self, folder_path: str, output_path: str, language: str, prompt: str,
+                          beam_size: int = 1, workers: int = 1):
         if not os.path.exists(folder_path):
             print(f"❌ 資料夾不存在: {folder_path}")
             return
 
+        # 一次正規化成絕對路徑：帶 ".." 的相對路徑在 Drive FUSE 上
+        # 每次 open/stat 都要重新解析，而且 cwd 一變就壞
+        folder_path = os.path.abspath(folder_path)
+        output_path = os.path.abspath(output_path)
+
         audio_extensions = ('.mp3', '.m4a', '.wav', '.flac')
-        files = [f for f in os.listdir(folder_path) if f.lower().endswith(audio_extensions)]
-        files.sort()
-        
-        print(f"\n📂 處理資料夾: {folder_path} (共 {len(files)} 個檔案)")
-        print(f"📂 輸出位置: {output_path}")
-        
-        for f in files:
-            self.transcribe_file(
-                audio_path=os.path.join(folder_path, f),
-                output_dir=output_path,
-                language=language,
-                initial_prompt=prompt
+        # scandir 一趟拿到名稱+路徑+stat (listdir 之後逐檔 join/stat 在 Drive FUSE 上特別慢)
+        with os.scandir(folder_path) as it:
+            entries = sorted(
+                (e for e in it if e.is_file() and e.name.lower().endswith(audio_extensions)),
+                key=lambda e: e.name
             )
 
+        print(f"\n📂 處理資料夾: {folder_path} (共 {len(entries)} 個檔案)")
+        print(f"📂 輸出位置: {output_path}")
+
+        # 一次 scandir 掃出已完成的轉錄 (有 .json/.json.gz 才算完成) 與其 mtime，取代逐檔多次 stat
+        # 舊格式的 .json 也認，換版後不用全部重轉
+        os.makedirs(output_path, exist_ok=True)
+        json_mtimes = {}
+        for entry in os.scandir(output_path):
+            if entry.name.endswith('.json.gz'):
+                base = entry.name[:-len('.json.gz')]
+            elif entry.name.endswith('.json'):
+                base = entry.name[:-len('.json')]
+            else:
+                continue
+            json_mtimes[base] = max(json_mtimes.get(base, 0), entry.stat().st_mtime)
+
+        # 先一次決定哪些檔案要做：轉錄比音檔舊 (同名重新上傳過) 也視為未完成
+        # DirEntry.stat 用的是 scandir 已快取的結果，不再多打 stat syscall
+        fresh = set()
+        pending = []
+        for entry in entries:
+            base = os.path.splitext(entry.name)[0]
+            json_mtime = json_mtimes.get(base)
+            if json_mtime is not None and json_mtime >= entry.stat(follow_symlinks=False).st_mtime:
+                fresh.add(base)
+                print(f"⏭️  跳過已轉錄檔案: {entry.name}")
+            else:
+                pending.append(entry)
+
+        if not pending:
+            return
+
+        if workers > 1 and self.device != "cuda":
+            self._transcribe_folder_parallel(output_path, language, prompt,
+                                             beam_size, workers, pending)
+            return
+
+        # 預取管線：背景執行緒先把下一個檔案解碼成 numpy (PyAV 解碼會釋放 GIL)，
+        # 模型在轉錄目前檔案時，下一檔的磁碟讀取/解碼已經在進行
+        prefetch_q = queue.Queue(maxsize=2)
+
+        def _prefetch():
+            for entry in pending:
+                try:
+                    audio = _load_audio(entry.path)
+                except Exception as e:
+                    print(f"⚠️ 預解碼失敗 ({entry.name}): {e}")
+                    audio = None # 留給 transcribe_file 自己再試一次並回報
+                prefetch_q.put((entry, audio))
+            prefetch_q.put(None) # 收工訊號
+
+        producer = threading.Thread(target=_prefetch, daemon=True)
+        producer.start()
+
+        try:
+            while True:
+                item = prefetch_q.get()
+                if item is None:
+                    break
+                entry, audio = item
+                self.transcribe_file(
+                    audio_path=entry.path,
+                    output_dir=output_path,
+                    language=language,
+                    initial_prompt=prompt,
+                    beam_size=beam_size,
+                    done=fresh,
+                    audio=audio
+                )
+        finally:
+            producer.join(timeout=1)
+
+    def _transcribe_folder_parallel(self, output_path: str, language: str,
+                                    prompt: str, beam_size: int, workers: int,
+                                    pending: List[os.DirEntry]):
+        """CPU 多行程平行轉錄：檔案之間互相獨立，每個 worker 各自載一份模型"""
+        workers = min(workers, len(pending))
+        # 核心數平分給各 worker，避免 K 份模型搶同一批核心
+        cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+        print(f"🚀 啟動 {workers} 個轉錄行程 (每個 {cpu_threads} 執行緒)")
+
+        tasks = [
+            (entry.path, output_path, language, prompt, beam_size)
+            for entry in pending
+        ]
+
+        # CTranslate2 不是 fork-safe，一律用 spawn
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(self.model_size, self.device, self.compute_type, cpu_threads)
+        ) as executor:
+            list(executor.map(_transcribe_one, tasks))
+
 # --- 主程式區 (User Configuration) ---
 if __name__ == "__main__":
     # 1. 取得專案根目錄
@@ -192,12 +514,17 @@ if __name__ == "__main__":
     
     # Prompt 可以引導模型選字 (例如專有名詞)，也可以設為 None
     INITIAL_PROMPT = "這是一段台灣閩南語與國語的混合對話。請將台語內容準確轉錄為繁體中文。"
+
+    # [設定] Beam 寬度：預設 1 (greedy，最快)；難的音檔可以 WHISPER_BEAM=5 調回
+    BEAM_SIZE = int(os.environ.get("WHISPER_BEAM", "1"))
     # ------------------------------------
     
     # 3. 自動偵測環境
     is_colab = detect_environment()
     device = "cuda" if is_colab else "cpu"
-    compute_type = "float16" if is_colab else "int8"
+    # int8_float16: 權重 INT8 + FP16 累加，在 T4/A100 上比純 float16 快約 2 倍
+    # 且模型記憶體減半；若是沒有 FP16 Tensor Core 的老 GPU，請改回 "int8"
+    compute_type = "int8_float16" if is_colab else "int8"
     
     print(f"🔍 環境: {'Colab (GPU)' if is_colab else 'Local (CPU)'}")
     if TARGET_LANGUAGE:
@@ -216,5 +543,6 @@ if __name__ == "__main__":
         folder_path=INPUT_AUDIO_DIR,
         output_path=OUTPUT_TRANSCRIPT_DIR,
         language=TARGET_LANGUAGE,
-        prompt=INITIAL_PROMPT
+        prompt=INITIAL_PROMPT,
+        beam_size=BEAM_SIZE
     )
\ No newline at end of file